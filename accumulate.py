@@ -1,170 +1,395 @@
 import os
+import json
+import hashlib
+import shutil
+import numpy as np
 import pandas as pd
-from collections import defaultdict
 import argparse
-import plotly.express as px
-import imageio
+import plotly.graph_objects as go
+import plotly.io as pio
+import imageio.v3 as iio
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-def process_files_in_directory(directory):
-    # Initialize a defaultdict to keep track of accumulated word counts
-    accumulated_counts = defaultdict(int)
-    all_data = []
+try:
+    # Every write_image call serializes the figure to JSON for Kaleido;
+    # orjson encodes that payload several times faster than the stdlib.
+    # Set at import time so the render worker processes pick it up too.
+    import orjson  # noqa: F401
+    pio.json.config.default_engine = "orjson"
+except ImportError:
+    pass
 
-    # List all files in the given directory
-    file_names = sorted([f for f in os.listdir(directory) if f.startswith('palabras_') and f.endswith('.txt')])
+try:
+    import numba
 
-    for file_name in file_names:
+    @numba.njit(cache=True)
+    def _accumulate(ids, counts):
+        for i in range(ids.size):
+            counts[ids[i]] += 1
+except ImportError:
+    # Numba is optional: fall back to np.bincount when it is not installed
+    def _accumulate(ids, counts):
+        counts += np.bincount(ids, minlength=counts.size).astype(counts.dtype)
+
+def _file_date(file_name):
+    return file_name.replace("palabras_", "").replace(".txt", "")
+
+def process_files_in_directory(directory, counts_path=None, cache_dir=None):
+    # Map each word to a column index, assigned in order of first appearance
+    word_to_idx = {}
+    dates = []
+    rows = []
+
+    # Running cumulative counts, one entry per known word
+    cum = np.zeros(0, dtype=np.int32)
+
+    # List all files in the given directory; DirEntry objects cache their
+    # stat result, so the size used for the read below costs no extra syscall
+    with os.scandir(directory) as it:
+        entries = sorted(
+            (e for e in it if e.name.startswith('palabras_') and e.name.endswith('.txt')),
+            key=lambda e: e.name
+        )
+
+    # The cache is keyed by a hash of (name, mtime) for every input file:
+    # an exact hit returns the snapshot as-is, otherwise the newest
+    # snapshot seeds the accumulation and only newer files are replayed
+    snapshot_path = None
+    latest_path = None
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        manifest = repr([(e.name, e.stat().st_mtime_ns) for e in entries])
+        key = hashlib.sha256(manifest.encode()).hexdigest()
+        snapshot_path = os.path.join(cache_dir, f"{key}.parquet")
+        latest_path = os.path.join(cache_dir, "latest.parquet")
+
+        if os.path.exists(snapshot_path):
+            return load_counts_from_parquet(snapshot_path)
+
+        if os.path.exists(latest_path):
+            cached = load_counts_from_parquet(latest_path)
+            word_to_idx = {word: i for i, word in enumerate(cached.columns[1:])}
+            dates = list(cached['date'])
+            rows = list(cached.iloc[:, 1:].to_numpy().astype(np.int32))
+            cum = rows[-1].copy()
+            entries = [e for e in entries if _file_date(e.name) > dates[-1]]
+
+    file_names = [e.name for e in entries]
+    row_offset = len(dates)
+    n_days = row_offset + len(entries)
+
+    # With counts_path the matrix lives in a memory-mapped file instead of
+    # RAM: each day only touches its own row and the OS handles paging, so
+    # the dataset can grow past memory. The width is doubled on demand.
+    memmap = None
+    capacity = 0
+    if counts_path is not None:
+        capacity = max(1024, cum.size)
+        memmap = np.memmap(counts_path, dtype=np.int32, mode='w+',
+                           shape=(n_days, capacity))
+        for i, row in enumerate(rows):
+            memmap[i, :row.size] = row
+        rows = []
+
+    def read_words(entry):
+        # Raw os.open/os.read with the cached file size: one read call per
+        # file, no buffered-IO layer and no re-stat
+        fd = os.open(entry.path, os.O_RDONLY)
+        try:
+            data = os.read(fd, entry.stat().st_size)
+        finally:
+            os.close(fd)
+        return data.decode('utf-8').splitlines()
+
+    # Read all files concurrently; open/read are I/O bound and release the
+    # GIL, while map keeps the results in file order so the accumulation
+    # below stays deterministic
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        contents = list(executor.map(read_words, entries))
+
+    for day, (file_name, words) in enumerate(zip(file_names, contents), start=row_offset):
         # Extract date from file name
-        date_str = file_name.replace("palabras_", "").replace(".txt", "")
-        
-        # Construct the full path to the file
-        file_path = os.path.join(directory, file_name)
-        
-        # Read the words from the file
-        with open(file_path, 'r') as file:
-            words = file.read().splitlines()
-        
-        # Update accumulated word counts
-        for word in words:
-            accumulated_counts[word] += 1
-        
-        # Add a row to the dataset with the current accumulated counts
-        row = {'date': date_str}
-        row.update(accumulated_counts)
-        all_data.append(row)
-    
-    # Convert the list of dictionaries to a DataFrame
-    df = pd.DataFrame(all_data)
-    
-    # Fill missing values with 0 (for words not yet encountered)
-    df.fillna(0, inplace=True)
+        date_str = _file_date(file_name)
+
+        # Map words to indices, registering any new ones
+        idx_array = np.fromiter(
+            (word_to_idx.setdefault(word, len(word_to_idx)) for word in words),
+            dtype=np.int64, count=len(words)
+        )
+
+        # Widen the cumulative vector when new words appeared, then add
+        # this file's words to the running totals with the JIT kernel
+        if cum.size < len(word_to_idx):
+            cum = np.pad(cum, (0, len(word_to_idx) - cum.size))
+        _accumulate(idx_array, cum)
+
+        dates.append(date_str)
+        if memmap is None:
+            rows.append(cum.copy())
+        else:
+            if cum.size > capacity:
+                # Recreate the memmap with double the width, preserving the
+                # rows written so far (only `day` of them exist yet)
+                written = np.array(memmap[:day, :])
+                capacity = max(capacity * 2, cum.size)
+                memmap = np.memmap(counts_path, dtype=np.int32, mode='w+',
+                                   shape=(n_days, capacity))
+                memmap[:day, :written.shape[1]] = written
+            memmap[day, :cum.size] = cum
+            memmap.flush()
+
+    # Copy the rows into one preallocated zero matrix; words not yet seen
+    # on a given day keep the default 0, so no fill pass is needed
+    n_words = len(word_to_idx)
+    if memmap is None:
+        matrix = np.zeros((n_days, n_words), dtype=np.int32)
+        for i, row in enumerate(rows):
+            matrix[i, :row.size] = row
+    else:
+        # Reopen read-only so the DataFrame is backed by the OS page cache,
+        # which other processes mapping the same file can share
+        matrix = np.memmap(counts_path, dtype=np.int32, mode='r',
+                           shape=(n_days, capacity))[:, :n_words]
+
+    df = pd.DataFrame(matrix, columns=list(word_to_idx), copy=False)
+    df.insert(0, 'date', dates)
+
+    # Save the new snapshot atomically and point latest.parquet at it for
+    # the next incremental run
+    if snapshot_path is not None:
+        tmp_path = snapshot_path + '.tmp'
+        _write_counts_parquet(df, tmp_path)
+        os.replace(tmp_path, snapshot_path)
+        shutil.copyfile(snapshot_path, latest_path + '.tmp')
+        os.replace(latest_path + '.tmp', latest_path)
+
+    return df
+
+def _write_counts_parquet(df, parquet_path):
+    # pyarrow is only needed when the Parquet paths are used
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Store the counts in long form (date, word, count), keeping only the
+    # nonzero entries: the wide matrix grows as days x unique_words while
+    # the long form only grows with the words actually seen
+    values = df.iloc[:, 1:].to_numpy()
+    words = np.asarray(df.columns[1:])
+    row_idx, col_idx = np.nonzero(values)
+
+    table = pa.Table.from_pydict({
+        'date': df['date'].to_numpy()[row_idx],
+        'word': words[col_idx],
+        'count': values[row_idx, col_idx],
+    })
+    # Record the first-appearance column order so loading restores the
+    # exact DataFrame, not an alphabetically pivoted one
+    table = table.replace_schema_metadata({'word_order': json.dumps(words.tolist())})
+    pq.write_table(table, parquet_path, compression='zstd')
+
+def save_counts_as_parquet(df, parquet_path):
+    _write_counts_parquet(df, parquet_path)
+    print(f"Parquet saved to {parquet_path}")
+
+def load_counts_from_parquet(parquet_path):
+    import pyarrow.parquet as pq
+
+    # Pivot the long (date, word, count) form back to the wide matrix the
+    # chart functions expect; missing entries are words not yet seen
+    table = pq.read_table(parquet_path)
+    long_df = table.to_pandas()
+    df = long_df.pivot(index='date', columns='word', values='count')
+    df = df.fillna(0).astype(np.int32).reset_index().rename_axis(columns=None)
+
+    # Restore the stored first-appearance column order, if present, so a
+    # cached load is indistinguishable from a fresh run
+    metadata = table.schema.metadata or {}
+    if b'word_order' in metadata:
+        df = df[['date'] + json.loads(metadata[b'word_order'])]
 
     return df
 
 def create_race_chart(df):
-    # Reshape the DataFrame for Plotly
-    df_melted = df.melt(id_vars=["date"], var_name="word", value_name="count")
-
-    # Create the race chart using Plotly Express
-    fig = px.bar(
-        df_melted,
-        x="count",
-        y="word",
-        color="word",
-        orientation="h",
-        animation_frame="date",
-        range_x=[0, df_melted["count"].max() + 5],
-        title="Word Frequency Over Time",
-        labels={"count": "Cumulative Word Count", "word": "Words"}
-    )
+    words = list(df.columns[1:])
+    values = df.iloc[:, 1:].to_numpy()
+    range_x = [0, values.max() + 5]
 
-    # Update the layout to ensure the chart is visually appealing
-    fig.update_layout(
-        xaxis_title="Cumulative Word Count",
-        yaxis_title="Words",
-        yaxis={'categoryorder': 'total ascending'},
-        showlegend=False,
-        template="plotly_white"
+    # Build the frames directly from the wide matrix, one bar trace per
+    # day, instead of melting to long form and going through px.bar
+    frames = [
+        go.Frame(
+            name=str(date),
+            data=[go.Bar(x=values[i], y=words, orientation='h')]
+        )
+        for i, date in enumerate(df['date'])
+    ]
+
+    fig = go.Figure(
+        data=frames[0].data,
+        frames=frames,
+        layout=go.Layout(
+            title="Word Frequency Over Time",
+            xaxis=dict(title="Cumulative Word Count", range=range_x),
+            yaxis=dict(title="Words", categoryorder='total ascending'),
+            showlegend=False,
+            template="plotly_white",
+            updatemenus=[dict(
+                type="buttons",
+                buttons=[dict(
+                    label="Play",
+                    method="animate",
+                    args=[None, dict(frame=dict(duration=500, redraw=True))]
+                )]
+            )]
+        )
     )
 
     return fig
 
-def save_animation_as_gif(fig, gif_path, frame_duration=500):
+def _render_frame_image(task):
+    # Worker for the frame-rendering pool: rebuild a minimal figure from
+    # pickle-safe dicts and export it, so the full animated figure never
+    # crosses the process boundary. The layout arrives complete, so the
+    # figure is validated exactly once and never mutated afterwards.
+    frame_data, frame_layout, frame_path = task
+
+    frame_fig = go.Figure(data=frame_data, layout=frame_layout)
+    frame_fig.write_image(frame_path, engine="kaleido")
+    return frame_path
+
+def save_animation_as_gif(df, gif_path, frame_duration=500):
     with tempfile.TemporaryDirectory() as temp_dir:
-        # Extract all frames and save them as images
-        frame_files = []
-        
-        for frame_number in range(len(fig.frames)):
-            # Update the data in the figure with the data from the current frame
-            fig.update(data=fig.frames[frame_number].data)
-            
-            # Update the layout with the correct frame to match the update
-            fig.layout.update(fig.frames[frame_number].layout)
-            
-            # Add annotation with the current date in the top right corner
-            current_date = fig.frames[frame_number].name
-            fig.add_annotation(
+        words = list(df.columns[1:])
+        range_x = [0, df.iloc[:, 1:].to_numpy().max() + 5]
+
+        # Validate the shared layout once, up front; per frame only the
+        # date annotation dict changes on a shallow copy
+        base_layout = go.Layout(
+            title="Word Frequency Over Time",
+            xaxis=dict(title="Cumulative Word Count", range=range_x),
+            yaxis=dict(title="Words", categoryorder='total ascending'),
+            showlegend=False,
+            template="plotly_white"
+        ).to_plotly_json()
+
+        # Build one pickle-safe task per frame straight from the DataFrame
+        # rows: no animated figure, no melt, no per-frame figure mutation
+        tasks = []
+        for frame_number in range(len(df)):
+            # hoverinfo is meaningless in a static export; skipping it
+            # keeps the serialized payload smaller
+            frame_data = [dict(
+                type='bar',
+                x=df.iloc[frame_number, 1:].tolist(),
+                y=words,
+                orientation='h',
+                hoverinfo='skip'
+            )]
+            # Date annotation in the top right corner, slightly above it
+            frame_layout = dict(base_layout, annotations=[dict(
                 xref="paper", yref="paper",
-                x=1, y=1.1,  # Adjusted position, slightly above the top right corner
+                x=1, y=1.1,
                 xanchor="right", yanchor="top",
-                text=f"Date: {current_date}",
+                text=f"Date: {df.iloc[frame_number]['date']}",
                 showarrow=False,
                 font=dict(size=14)
-            )
-            
-            # Save the current frame as an image
+            )])
             frame_path = os.path.join(temp_dir, f"frame_{frame_number}.png")
-            fig.write_image(frame_path)
-            frame_files.append(frame_path)
-            
-            # Remove the annotation for the next frame
-            fig.layout.annotations = []
-
-        # Create GIF from saved frames
-        with imageio.get_writer(gif_path, mode='I', duration=frame_duration / 1000) as writer:
-            for frame_file in frame_files:
-                image = imageio.imread(frame_file)
-                writer.append_data(image)
+            tasks.append((frame_data, frame_layout, frame_path))
+
+        # Frames are independent, so render them in parallel; map preserves
+        # frame order in the returned paths
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            frame_files = list(executor.map(_render_frame_image, tasks))
+
+        # Create GIF from saved frames in a single write: stacking the
+        # frames lets the encoder quantize one shared palette instead of
+        # going frame by frame through the writer
+        frames = np.stack([iio.imread(frame_file) for frame_file in frame_files])
+        iio.imwrite(gif_path, frames, duration=frame_duration, loop=0)
 
     print(f"GIF saved to {gif_path}")
 
 
+def _render_bar_svg(words, counts, title, width=700, bar_height=18, row_pitch=26):
+    from html import escape
+
+    left, right, top = 150, 60, 50
+    scale = (width - left - right) / max(int(counts.max()), 1)
+
+    # Hand-written SVG: a title, one steelblue rect per word and the word
+    # and count as text labels, largest count first
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
+        f'height="{top + row_pitch * len(words) + 10}" font-family="sans-serif">',
+        '<rect width="100%" height="100%" fill="white"/>',
+        f'<text x="{width // 2}" y="28" text-anchor="middle" font-size="16">{escape(title)}</text>'
+    ]
+    for i, (word, count) in enumerate(zip(words, counts)):
+        y = top + i * row_pitch
+        bar_width = count * scale
+        parts.append(f'<rect x="{left}" y="{y}" width="{bar_width:.1f}" height="{bar_height}" fill="steelblue"/>')
+        parts.append(f'<text x="{left - 6}" y="{y + bar_height - 4}" text-anchor="end" font-size="12">{escape(str(word))}</text>')
+        parts.append(f'<text x="{left + bar_width + 6:.1f}" y="{y + bar_height - 4}" font-size="12">{count}</text>')
+    parts.append('</svg>')
+
+    return ''.join(parts)
+
 def save_last_row_as_png(df, png_path):
-    # Get the last row of the DataFrame
-    last_row = df.iloc[-1]
-    
-    # Convert the last row to a DataFrame for plotting
-    last_row_df = last_row.drop('date').reset_index()
-    last_row_df.columns = ['word', 'count']
-    # Sort by count and select the top 15 words
-    top_15_words_df = last_row_df.sort_values(by='count', ascending=False).head(15)
-    
-    # Create a bar plot using Plotly Express
-    fig = px.bar(
-        top_15_words_df,
-        x='count',
-        y='word',
-        orientation='h',
-        title=f"Word Frequency on {last_row['date']}",
-        labels={"count": "Cumulative Word Count", "word": "Words"}
-    )
-    
-    fig.update_layout(
-        xaxis_title="Cumulative Word Count",
-        yaxis_title="Words",
-        yaxis={'categoryorder': 'total ascending'},
-        showlegend=False,
-        template="plotly_white",
-        margin=dict(l=150, r=50, t=50, b=50)  # Adjust margins to ensure all rows are visible
-    )
+    # cairosvg is only needed when the PNG output is requested
+    import cairosvg
 
-    # Save the plot as a PNG file
-    fig.write_image(png_path)
+    # Select the top 15 words of the last row with argpartition: O(N)
+    # instead of sorting the whole vocabulary, then order just those 15
+    values = df.iloc[-1, 1:].to_numpy()
+    top_k = min(15, values.size)
+    top_idx = np.argpartition(values, -top_k)[-top_k:]
+    top_idx = top_idx[np.argsort(values[top_idx])[::-1]]
+
+    words = df.columns[1:][top_idx]
+    counts = values[top_idx]
+
+    # Emit the bar chart as an SVG string and rasterize it directly,
+    # skipping the Plotly figure and the Kaleido/Chromium roundtrip
+    svg = _render_bar_svg(words, counts, f"Word Frequency on {df.iloc[-1]['date']}")
+    cairosvg.svg2png(bytestring=svg.encode('utf-8'), write_to=png_path)
     print(f"PNG saved to {png_path}")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Process text files and accumulate word counts.")
-    parser.add_argument("input_dir", type=str, help="Directory containing the input text files.")
+    parser.add_argument("input_dir", type=str, nargs="?", help="Directory containing the input text files.")
+    parser.add_argument("--input_parquet", type=str, help="Load the accumulated counts from a Parquet file instead of processing a directory.")
+    parser.add_argument("--counts_memmap", type=str, help="Back the accumulated counts matrix with a memory-mapped file at this path.")
+    parser.add_argument("--cache_dir", type=str, help="Directory for cached count snapshots; unchanged inputs are loaded from cache and only new files are processed.")
     parser.add_argument("--output_gif", type=str, help="Path to save the output GIF animation.")
     parser.add_argument("--output_csv", type=str, help="Path to save the output CSV file.")
+    parser.add_argument("--output_parquet", type=str, help="Path to save the accumulated counts as a long-form Parquet file.")
     parser.add_argument("--output_png", type=str, help="Path to save the bar plot of the last row as a PNG file.")
     parser.add_argument("--show_animation", action="store_true", help="Show the animation in a window.")
     
     args = parser.parse_args()
     
-    df = process_files_in_directory(args.input_dir)
-
-    fig = create_race_chart(df)
+    if args.input_parquet:
+        df = load_counts_from_parquet(args.input_parquet)
+    elif args.input_dir:
+        df = process_files_in_directory(args.input_dir, counts_path=args.counts_memmap,
+                                        cache_dir=args.cache_dir)
+    else:
+        parser.error("either input_dir or --input_parquet is required")
 
     if args.output_csv:
         df.to_csv(args.output_csv, index=False)
 
+    if args.output_parquet:
+        save_counts_as_parquet(df, args.output_parquet)
+
     if args.output_gif:
-        save_animation_as_gif(fig, args.output_gif)
-    
+        save_animation_as_gif(df, args.output_gif)
+
     if args.show_animation:
+        fig = create_race_chart(df)
         fig.show()
 
     if args.output_png:
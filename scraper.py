@@ -1,9 +1,41 @@
 import os
+import json
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
 import argparse
 
+def load_cache(cache_path):
+    if not os.path.exists(cache_path):
+        return {}
+
+    with open(cache_path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def conditional_headers(cached):
+    # Construye las cabeceras condicionales a partir del ETag/Last-Modified
+    # guardados en la descarga anterior
+    headers = {}
+    if cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+    if cached.get('last_modified'):
+        headers['If-Modified-Since'] = cached['last_modified']
+    return headers
+
+def save_cache(cache_path, response, words):
+    # Se guardan también las palabras para poder escribir el archivo diario
+    # cuando el servidor responda 304
+    with open(cache_path, 'w', encoding='utf-8') as file:
+        json.dump({
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'words': words,
+        }, file, ensure_ascii=False)
+
+def write_words_file(file_path, words):
+    with open(file_path, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(words) + '\n')
+
 def main(output_dir):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
@@ -21,21 +53,38 @@ def main(output_dir):
 
     url = 'https://academia.gal/dicionario'
 
-    response = requests.get(url)
-    html_content = response.content
+    # Petición condicional: si el servidor responde 304 la página no ha
+    # cambiado y nos ahorramos la descarga y el análisis del HTML
+    cache_path = os.path.join(output_dir, 'http_cache.json')
+    cached = load_cache(cache_path)
+    response = requests.get(url, headers=conditional_headers(cached))
 
-    soup = BeautifulSoup(html_content, 'html.parser')
+    if response.status_code == 304:
+        if cached.get('words'):
+            # La página no cambió, pero el archivo de hoy debe escribirse
+            # igualmente: cada día cuenta como una aparición de sus palabras
+            write_words_file(file_path, cached['words'])
+            print(f"La página no ha cambiado; palabras cacheadas escritas en {file_path}")
+            return
+        # Caché sin palabras (formato antiguo): repetir la descarga completa
+        response = requests.get(url)
+
+    html_content = response.content
 
-    top_searches_div = soup.find('div', id='_com_ideit_ragportal_liferay_dictionary_TopSearchsPortlet_INSTANCE_kzkg_')
+    # El parser 'lxml' es C puro y un único selector CSS evita recorrer el
+    # árbol tres veces con find/find_all
+    soup = BeautifulSoup(html_content, 'lxml')
 
-    if top_searches_div:
-        week_list = top_searches_div.find('ul', class_='dictionary-topsearch__list--week')
+    links = soup.select(
+        'div#_com_ideit_ragportal_liferay_dictionary_TopSearchsPortlet_INSTANCE_kzkg_ '
+        'ul.dictionary-topsearch__list--week li.dictionary-topsearch__item a'
+    )
 
-        words = [item.find('a').text for item in week_list.find_all('li', class_='dictionary-topsearch__item')]
+    if links:
+        words = [link.text for link in links]
 
-        with open(file_path, 'w', encoding='utf-8') as file:
-            for word in words:
-                file.write(f"{word}\n")
+        write_words_file(file_path, words)
+        save_cache(cache_path, response, words)
         print(f"Las palabras más buscadas han sido escritas en {file_path}")
     else:
         print("No se encontró el div específico.")